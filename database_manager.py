@@ -1,8 +1,135 @@
 import sqlite3
 import json
+import threading
 from typing import List, Dict, Optional
 from datetime import datetime
 
+try:
+    import orjson  # быстрая C-сериализация JSON, опционально
+except ImportError:
+    orjson = None
+
+
+# Поля проекта/покупателя и их значения по умолчанию — порядок совпадает
+# с порядком колонок в INSERT-выражениях ниже
+_PROJECT_FIELDS = (
+    ('id', None),
+    ('name', ''),
+    ('url', ''),
+    ('description', ''),
+    ('price_limit', ''),
+    ('possible_price_limit', ''),
+    ('category_id', ''),
+    ('status', ''),
+    ('time_left', ''),
+    ('offers_count', 0),
+    ('date_create', ''),
+    ('date_active', ''),
+    ('date_expire', ''),
+    ('kwork_count', 0),
+    ('is_higher_price', False),
+)
+
+_BUYER_FIELDS = (
+    ('user_id', ''),
+    ('username', ''),
+    ('profile_url', ''),
+    ('avatar', ''),
+    ('wants_count', ''),
+    ('hired_percent', ''),
+)
+
+
+def _field_value(record, field: str, default):
+    """Значение поля из записи-датакласса (models.Project/Buyer) или словаря"""
+    if isinstance(record, dict):
+        return record.get(field, default)
+    return getattr(record, field)
+
+
+def _project_row(project) -> tuple:
+    """Кортеж параметров проекта для INSERT в порядке _PROJECT_FIELDS"""
+    return tuple(_field_value(project, field, default) for field, default in _PROJECT_FIELDS)
+
+
+def _buyer_row(buyer) -> tuple:
+    """Кортеж параметров покупателя для INSERT в порядке _BUYER_FIELDS"""
+    return tuple(_field_value(buyer, field, default) for field, default in _BUYER_FIELDS)
+
+
+# SQL горячих путей собирается один раз из таблиц полей выше, так что
+# порядок колонок гарантированно совпадает с _project_row/_buyer_row.
+# Константы на уровне модуля: sqlite3 кэширует подготовленные выражения
+# по тексту SQL, одинаковые строки-объекты гарантируют попадание в кэш
+# без повторной компиляции
+_PROJECT_COLUMNS = tuple(field for field, _ in _PROJECT_FIELDS)
+_BUYER_COLUMNS = tuple(field for field, _ in _BUYER_FIELDS)
+
+
+def _build_insert_sql(table: str, columns: tuple, conflict_key: str = None) -> str:
+    """
+    Собирает INSERT для таблицы: OR IGNORE либо UPSERT по conflict_key
+
+    UPSERT вместо INSERT OR REPLACE: REPLACE удаляет и заново вставляет
+    строку (ломая ссылки по внешним ключам и created_at), UPDATE меняет
+    на месте.
+    """
+    cols = ', '.join(columns)
+    marks = ', '.join('?' * len(columns))
+    if conflict_key is None:
+        return f"INSERT OR IGNORE INTO {table} ({cols}) VALUES ({marks})"
+
+    updates = ',\n        '.join(
+        f"{col}=excluded.{col}" for col in columns if col != conflict_key
+    )
+    return (
+        f"INSERT INTO {table} ({cols}) VALUES ({marks})\n"
+        f"    ON CONFLICT({conflict_key}) DO UPDATE SET\n"
+        f"        {updates},\n"
+        f"        updated_at=CURRENT_TIMESTAMP"
+    )
+
+
+_SQL_INSERT_PROJECT = _build_insert_sql('projects', _PROJECT_COLUMNS)
+_SQL_UPSERT_PROJECT = _build_insert_sql('projects', _PROJECT_COLUMNS, 'id')
+_SQL_INSERT_BUYER = _build_insert_sql('buyers', _BUYER_COLUMNS, 'user_id')
+
+_SQL_INSERT_LINK = """
+    INSERT OR IGNORE INTO project_buyers
+    (project_id, buyer_user_id)
+    VALUES (?, ?)
+"""
+
+_SQL_PROJECT_EXISTS = "SELECT id FROM projects WHERE id = ?"
+
+# Максимальный размер IN-списка в одном запросе
+_IN_CHUNK_SIZE = 500
+
+_SQL_SELECT_ALL_PROJECTS = """
+    SELECT p.*,
+           b.user_id AS b_user_id,
+           b.username AS b_username,
+           b.profile_url AS b_profile_url,
+           b.avatar AS b_avatar,
+           b.wants_count AS b_wants_count,
+           b.hired_percent AS b_hired_percent,
+           b.created_at AS b_created_at,
+           b.updated_at AS b_updated_at
+    FROM projects p
+    LEFT JOIN project_buyers pb ON pb.project_id = p.id
+    LEFT JOIN buyers b ON b.user_id = pb.buyer_user_id
+"""
+
+_BUYER_KEYS = ('user_id', 'username', 'profile_url', 'avatar',
+               'wants_count', 'hired_percent', 'created_at', 'updated_at')
+
+_SQL_STATISTICS = """
+    SELECT (SELECT COUNT(*) FROM projects) AS total_projects,
+           (SELECT COUNT(*) FROM buyers) AS total_buyers,
+           (SELECT name FROM projects ORDER BY created_at DESC LIMIT 1) AS last_name,
+           (SELECT created_at FROM projects ORDER BY created_at DESC LIMIT 1) AS last_created_at
+"""
+
 
 class DatabaseManager:
     """Менеджер для работы с базой данных SQLite"""
@@ -17,17 +144,58 @@ class DatabaseManager:
         self.db_path = db_path
         self.conn = None
         self.cursor = None
+        # Python-биндинги sqlite3 не полностью потокобезопасны в рамках
+        # одного соединения — записи сериализуем этим замком
+        self.write_lock = threading.Lock()
     
     def connect(self):
-        """Подключение к базе данных"""
-        self.conn = sqlite3.connect(self.db_path)
+        """
+        Подключение к базе данных
+
+        Включает WAL-режим и настраивает PRAGMA для производительности.
+        В WAL-режиме рядом с файлом БД появляются постоянные
+        файлы -wal и -shm — это нормально, удалять их не нужно.
+        """
+        # isolation_level=None — автокоммит без неявных BEGIN от python,
+        # транзакции открываем явно через BEGIN IMMEDIATE;
+        # cached_statements=256 — увеличенный LRU-кэш подготовленных выражений;
+        # check_same_thread=False + cache=shared — чтобы фоновый демон мог
+        # читать статистику из другого потока, пока идёт запись (записи
+        # при этом защищены self.write_lock)
+        self.conn = sqlite3.connect(
+            f"file:{self.db_path}?cache=shared&mode=rwc",
+            uri=True,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=256
+        )
         self.conn.row_factory = sqlite3.Row  # Для получения результатов как словарей
         self.cursor = self.conn.cursor()
+
+        # WAL: коммиты без fsync на каждую транзакцию, чтение не блокирует запись
+        self.cursor.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            PRAGMA foreign_keys=ON;
+            PRAGMA temp_store=MEMORY;
+            PRAGMA cache_size=-65536;
+            PRAGMA mmap_size=268435456;
+        """)
+
         print(f"✓ Подключено к базе данных: {self.db_path}")
     
     def disconnect(self):
         """Отключение от базы данных"""
         if self.conn:
+            try:
+                # Сворачиваем WAL-хвост в основной файл и обрезаем его,
+                # чтобы между запусками БД оставалась компактной, а
+                # следующее открытие не переигрывало журнал; заодно
+                # обновляем статистику планировщика
+                self.cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                self.cursor.execute("PRAGMA optimize")
+            except sqlite3.Error:
+                pass  # Закрытие важнее чекпоинта
             self.conn.close()
             print("✓ Отключено от базы данных")
     
@@ -58,6 +226,8 @@ class DatabaseManager:
         """)
         
         # Создание таблицы покупателей
+        # WITHOUT ROWID: строки лежат прямо в b-дереве первичного ключа,
+        # без лишнего b-дерева user_id -> rowid (ключ текстовый)
         self.cursor.execute("""
             CREATE TABLE IF NOT EXISTS buyers (
                 user_id TEXT PRIMARY KEY,
@@ -68,9 +238,9 @@ class DatabaseManager:
                 hired_percent TEXT,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
+            ) WITHOUT ROWID
         """)
-        
+
         # Связь проектов с покупателями
         self.cursor.execute("""
             CREATE TABLE IF NOT EXISTS project_buyers (
@@ -79,7 +249,7 @@ class DatabaseManager:
                 PRIMARY KEY (project_id, buyer_user_id),
                 FOREIGN KEY (project_id) REFERENCES projects(id),
                 FOREIGN KEY (buyer_user_id) REFERENCES buyers(user_id)
-            )
+            ) WITHOUT ROWID
         """)
         
         # Индексы
@@ -94,9 +264,14 @@ class DatabaseManager:
         """)
         
         self.cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_buyers_username 
+            CREATE INDEX IF NOT EXISTS idx_buyers_username
             ON buyers(username)
         """)
+
+        self.cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_projects_created_at
+            ON projects(created_at)
+        """)
         
         self.conn.commit()
         print("✓ База данных инициализирована")
@@ -111,7 +286,7 @@ class DatabaseManager:
         Returns:
             True если проект существует, False иначе
         """
-        self.cursor.execute("SELECT id FROM projects WHERE id = ?", (project_id,))
+        self.cursor.execute(_SQL_PROJECT_EXISTS, (project_id,))
         return self.cursor.fetchone() is not None
     
     def get_existing_project_ids(self, project_ids: List[int]) -> set:
@@ -126,12 +301,19 @@ class DatabaseManager:
         """
         if not project_ids:
             return set()
-        
-        placeholders = ','.join('?' * len(project_ids))
-        query = f"SELECT id FROM projects WHERE id IN ({placeholders})"
-        self.cursor.execute(query, project_ids)
-        
-        return {row['id'] for row in self.cursor.fetchall()}
+
+        # Режем IN-список на части: у SQLite есть лимит на количество
+        # параметров (999 в старых сборках), а гигантский IN раздувает
+        # подготовленное выражение и ломает кэш
+        existing = set()
+        for start in range(0, len(project_ids), _IN_CHUNK_SIZE):
+            chunk = project_ids[start:start + _IN_CHUNK_SIZE]
+            placeholders = ','.join('?' * len(chunk))
+            query = f"SELECT id FROM projects WHERE id IN ({placeholders})"
+            self.cursor.execute(query, chunk)
+            existing.update(row['id'] for row in self.cursor.fetchall())
+
+        return existing
     
     def insert_buyer(self, buyer_data: Dict):
         """
@@ -140,49 +322,16 @@ class DatabaseManager:
         Args:
             buyer_data: словарь с данными о покупателе
         """
-        self.cursor.execute("""
-            INSERT OR REPLACE INTO buyers 
-            (user_id, username, profile_url, avatar, wants_count, hired_percent, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-        """, (
-            buyer_data.get('user_id', ''),
-            buyer_data.get('username', ''),
-            buyer_data.get('profile_url', ''),
-            buyer_data.get('avatar', ''),
-            buyer_data.get('wants_count', ''),
-            buyer_data.get('hired_percent', '')
-        ))
+        self.cursor.execute(_SQL_INSERT_BUYER, _buyer_row(buyer_data))
     
     def insert_project(self, project: Dict):
         """
-        Вставка проекта в БД
-        
+        Вставка или обновление проекта в БД
+
         Args:
             project: словарь с данными о проекте
         """
-        self.cursor.execute("""
-            INSERT OR REPLACE INTO projects 
-            (id, name, url, description, price_limit, possible_price_limit, 
-             category_id, status, time_left, offers_count, date_create, 
-             date_active, date_expire, kwork_count, is_higher_price, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-        """, (
-            project.get('id'),
-            project.get('name', ''),
-            project.get('url', ''),
-            project.get('description', ''),
-            project.get('price_limit', ''),
-            project.get('possible_price_limit', ''),
-            project.get('category_id', ''),
-            project.get('status', ''),
-            project.get('time_left', ''),
-            project.get('offers_count', 0),
-            project.get('date_create', ''),
-            project.get('date_active', ''),
-            project.get('date_expire', ''),
-            project.get('kwork_count', 0),
-            project.get('is_higher_price', False)
-        ))
+        self.cursor.execute(_SQL_UPSERT_PROJECT, _project_row(project))
         
         # Вставка покупателя если есть
         if 'buyer' in project and project['buyer']:
@@ -191,70 +340,171 @@ class DatabaseManager:
             # Связь проекта с покупателем
             buyer_user_id = project['buyer'].get('user_id', '')
             if buyer_user_id:
-                self.cursor.execute("""
-                    INSERT OR IGNORE INTO project_buyers 
-                    (project_id, buyer_user_id)
-                    VALUES (?, ?)
-                """, (project.get('id'), buyer_user_id))
+                self.cursor.execute(_SQL_INSERT_LINK, (project.get('id'), buyer_user_id))
     
     def insert_projects(self, projects: List[Dict]) -> Dict[str, int]:
         """
-        Вставка списка проектов в БД
-        
+        Вставка списка проектов в БД (пакетно, одной транзакцией)
+
         Args:
             projects: список проектов
-            
+
         Returns:
             Статистика: {'inserted': количество новых, 'skipped': количество пропущенных}
         """
-        inserted = 0
-        skipped = 0
-        
+        # Готовим строки для трёх пакетных вставок; дубликаты проектов
+        # отсеет сам SQLite через INSERT OR IGNORE по первичному ключу,
+        # покупателей дедуплицируем по user_id ещё в Python, чтобы не
+        # гонять повторные UPSERT-ы одного и того же покупателя
+        project_rows = []
+        buyers_by_id = {}
+        link_rows = []
+
         for project in projects:
-            project_id = project.get('id')
+            project_id = _field_value(project, 'id', None)
             if not project_id:
                 continue
-            
-            if self.project_exists(project_id):
-                skipped += 1
-                print(f"⊘ Проект ID {project_id} уже существует, пропускаем")
-            else:
-                self.insert_project(project)
-                inserted += 1
-                print(f"✓ Добавлен проект ID {project_id}: {project.get('name', 'Без названия')[:50]}")
-        
-        self.conn.commit()
-        
+            project_rows.append(_project_row(project))
+
+            buyer = _field_value(project, 'buyer', None)
+            if buyer:
+                buyer_user_id = _field_value(buyer, 'user_id', '')
+                buyers_by_id[buyer_user_id] = _buyer_row(buyer)
+
+                if buyer_user_id:
+                    link_rows.append((project_id, buyer_user_id))
+
+        # Одна транзакция на весь пакет вместо коммита на каждую строку;
+        # BEGIN IMMEDIATE сразу берёт блокировку записи, без отложенного
+        # повышения с риском SQLITE_BUSY; количество новых строк — по
+        # дельте total_changes
+        with self.write_lock:
+            self.cursor.execute("BEGIN IMMEDIATE")
+            try:
+                before = self.conn.total_changes
+                self.cursor.executemany(_SQL_INSERT_PROJECT, project_rows)
+                inserted = self.conn.total_changes - before
+
+                self.cursor.executemany(_SQL_INSERT_BUYER, buyers_by_id.values())
+                self.cursor.executemany(_SQL_INSERT_LINK, link_rows)
+                self.cursor.execute("COMMIT")
+            except Exception:
+                self.cursor.execute("ROLLBACK")
+                raise
+
+        skipped = len(project_rows) - inserted
+        print(f"✓ Пакетная вставка: добавлено {inserted}, пропущено {skipped}")
+
         return {'inserted': inserted, 'skipped': skipped}
     
+    def insert_projects_returning_new(self, projects: List[Dict]) -> List[int]:
+        """
+        Вставка проектов с возвратом ID реально добавленных
+
+        Дубликаты отсеивает сам SQLite через INSERT OR IGNORE, новизна
+        строки определяется по cursor.rowcount — без предварительного
+        SELECT существующих ID. Всё в одной транзакции.
+
+        Args:
+            projects: список проектов
+
+        Returns:
+            Список ID проектов, которых раньше не было в БД
+        """
+        new_ids = []
+        buyers_by_id = {}
+        link_rows = []
+
+        with self.write_lock:
+            self.cursor.execute("BEGIN IMMEDIATE")
+            try:
+                for project in projects:
+                    project_id = _field_value(project, 'id', None)
+                    if not project_id:
+                        continue
+
+                    self.cursor.execute(_SQL_INSERT_PROJECT, _project_row(project))
+                    if self.cursor.rowcount != 1:
+                        continue  # уже была в БД
+
+                    new_ids.append(project_id)
+
+                    buyer = _field_value(project, 'buyer', None)
+                    if buyer:
+                        buyer_user_id = _field_value(buyer, 'user_id', '')
+                        buyers_by_id[buyer_user_id] = _buyer_row(buyer)
+                        if buyer_user_id:
+                            link_rows.append((project_id, buyer_user_id))
+
+                self.cursor.executemany(_SQL_INSERT_BUYER, buyers_by_id.values())
+                self.cursor.executemany(_SQL_INSERT_LINK, link_rows)
+                self.cursor.execute("COMMIT")
+            except Exception:
+                self.cursor.execute("ROLLBACK")
+                raise
+
+        return new_ids
+
     def get_all_projects(self) -> List[Dict]:
         """
-        Получить все проекты из БД
-        
+        Получить все проекты из БД (с покупателями одним JOIN-запросом)
+
         Returns:
             Список всех проектов
         """
-        self.cursor.execute("SELECT * FROM projects")
-        rows = self.cursor.fetchall()
-        
+        cursor = self._select_all_cursor()
+        project_cols, split = self._describe_select_all(cursor)
+
         projects = []
-        for row in rows:
-            project = dict(row)
-            
-            # Получаем данные о покупателе
-            self.cursor.execute("""
-                SELECT b.* FROM buyers b
-                JOIN project_buyers pb ON b.user_id = pb.buyer_user_id
-                WHERE pb.project_id = ?
-            """, (project['id'],))
-            
-            buyer_row = self.cursor.fetchone()
-            if buyer_row:
-                project['buyer'] = dict(buyer_row)
-            
-            projects.append(project)
-        
+        while True:
+            rows = cursor.fetchmany()
+            if not rows:
+                break
+            projects.extend(
+                self._row_to_project(row, project_cols, split) for row in rows
+            )
+
         return projects
+
+    def _select_all_cursor(self):
+        """
+        Открывает курсор с JOIN-запросом всех проектов
+
+        Курсор отдаёт кортежи (row_factory=None): распаковка по позициям
+        дешевле, чем sqlite3.Row -> dict на каждую строку.
+        """
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        cursor.arraysize = 1000
+        cursor.execute(_SQL_SELECT_ALL_PROJECTS)
+        return cursor
+
+    @staticmethod
+    def _describe_select_all(cursor):
+        """
+        Возвращает имена колонок проекта и позицию начала колонок b_*
+        """
+        names = [d[0] for d in cursor.description]
+        split = len(names) - len(_BUYER_KEYS)
+        return names[:split], split
+
+    @staticmethod
+    def _row_to_project(row, project_cols, split) -> Dict:
+        """
+        Собирает словарь проекта из кортежа JOIN-запроса
+
+        Args:
+            row: кортеж результата _SQL_SELECT_ALL_PROJECTS
+            project_cols: имена колонок проекта (до b_*)
+            split: индекс первой колонки покупателя
+
+        Returns:
+            Словарь проекта с вложенным 'buyer' (если есть)
+        """
+        project = dict(zip(project_cols, row))
+        if row[split] is not None:  # b_user_id
+            project['buyer'] = dict(zip(_BUYER_KEYS, row[split:]))
+        return project
     
     def get_statistics(self) -> Dict:
         """
@@ -263,45 +513,72 @@ class DatabaseManager:
         Returns:
             Словарь со статистикой
         """
-        stats = {}
-        
-        # Количество проектов
-        self.cursor.execute("SELECT COUNT(*) as count FROM projects")
-        stats['total_projects'] = self.cursor.fetchone()['count']
-        
-        # Количество покупателей
-        self.cursor.execute("SELECT COUNT(*) as count FROM buyers")
-        stats['total_buyers'] = self.cursor.fetchone()['count']
-        
-        # Последний добавленный проект
-        self.cursor.execute("SELECT name, created_at FROM projects ORDER BY created_at DESC LIMIT 1")
-        last_project = self.cursor.fetchone()
-        if last_project:
-            stats['last_project'] = dict(last_project)
-        
+        # Все счётчики одним запросом вместо трёх обращений к sqlite3
+        self.cursor.execute(_SQL_STATISTICS)
+        row = self.cursor.fetchone()
+
+        stats = {
+            'total_projects': row['total_projects'],
+            'total_buyers': row['total_buyers'],
+        }
+
+        if row['last_name'] is not None:
+            stats['last_project'] = {
+                'name': row['last_name'],
+                'created_at': row['last_created_at'],
+            }
+
         return stats
     
     def export_new_projects_to_json(self, output_file: str = "new_projects.json") -> int:
         """
-        Экспорт всех проектов в JSON файл
-        
+        Экспорт всех проектов в JSON файл (потоково, без списка в памяти)
+
         Args:
             output_file: имя выходного файла
-            
+
         Returns:
             Количество экспортированных проектов
         """
-        projects = self.get_all_projects()
-        
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(projects, f, ensure_ascii=False, indent=2)
-        
-        print(f"✓ Экспортировано {len(projects)} проектов в {output_file}")
-        return len(projects)
+        cursor = self._select_all_cursor()
+        project_cols, split = self._describe_select_all(cursor)
+
+        count = 0
+        with open(output_file, 'wb') as f:
+            f.write(b"[")
+
+            while True:
+                rows = cursor.fetchmany()
+                if not rows:
+                    break
+
+                for row in rows:
+                    project = self._row_to_project(row, project_cols, split)
+                    if orjson is not None:
+                        record = orjson.dumps(project)
+                    else:
+                        record = json.dumps(project, ensure_ascii=False).encode('utf-8')
+                    f.write(b",\n" if count else b"\n")
+                    f.write(record)
+                    count += 1
+
+            f.write(b"\n]")
+
+        print(f"✓ Экспортировано {count} проектов в {output_file}")
+        return count
 
     def clear_projects(self):
         """
-        Очищает таблицу проектов (последние 100)
+        Очищает таблицу проектов (самые старые 100) вместе со связями
         """
-        self.cursor.execute("DELETE FROM projects WHERE id IN (SELECT id FROM projects ORDER BY created_at ASC LIMIT 100)")
-        self.conn.commit()
+        oldest = "SELECT id FROM projects ORDER BY created_at ASC LIMIT 100"
+        with self.write_lock:
+            self.cursor.execute("BEGIN IMMEDIATE")
+            try:
+                # Сначала связи, чтобы не оставлять сирот в project_buyers
+                self.cursor.execute(f"DELETE FROM project_buyers WHERE project_id IN ({oldest})")
+                self.cursor.execute(f"DELETE FROM projects WHERE id IN ({oldest})")
+                self.cursor.execute("COMMIT")
+            except Exception:
+                self.cursor.execute("ROLLBACK")
+                raise
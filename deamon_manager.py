@@ -4,6 +4,7 @@
 Использует nohup для работы в фоне даже после выхода из терминала
 """
 
+import signal
 import subprocess
 import sys
 import os
@@ -46,24 +47,23 @@ def start_daemon():
     
     # Запуск в фоне
     try:
-        # Команда для запуска
-        cmd = f"nohup python3 kwork_parser_telegram.py >> {log_file} 2>&1 &"
-        
-        # Запускаем процесс
-        process = subprocess.Popen(
-            cmd,
-            shell=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            preexec_fn=os.setpgrp  # Создаем новую группу процессов
-        )
-        
-        # Небольшая пауза
-        time.sleep(2)
-        
-        # Получаем PID
+        # Запускаем python напрямую, без shell и nohup: иначе в PID-файл
+        # попадает PID оболочки, и stop_daemon убивает не парсер
+        log_fd = os.open(log_file, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            process = subprocess.Popen(
+                [sys.executable, 'kwork_parser_telegram.py'],
+                stdout=log_fd,
+                stderr=subprocess.STDOUT,
+                start_new_session=True,  # Отвязываемся от терминала
+                close_fds=True
+            )
+        finally:
+            os.close(log_fd)
+
+        # Получаем PID самого парсера
         pid = process.pid
-        
+
         # Сохраняем PID в файл
         with open(pid_file, 'w') as f:
             f.write(str(pid))
@@ -120,20 +120,27 @@ def stop_daemon():
     
     # Останавливаем процесс
     try:
-        os.kill(pid, 15)  # SIGTERM
+        os.kill(pid, signal.SIGTERM)
         print("✅ Сигнал остановки отправлен")
-        
-        # Ждем завершения
-        time.sleep(2)
-        
-        # Проверяем, завершился ли процесс
-        try:
-            os.kill(pid, 0)  # Проверка существования процесса
-            print("⚠️  Процесс еще работает, отправляем SIGKILL...")
-            os.kill(pid, 9)  # SIGKILL
-        except OSError:
+
+        # Ждем завершения с экспоненциальной выдержкой вместо
+        # фиксированных 2 секунд: быстрый выход — быстрое подтверждение,
+        # медленная очистка — больше времени до SIGKILL
+        stopped = False
+        for i in range(10):
+            time.sleep(min(0.1 * 2 ** i, 3.2))
+            try:
+                os.kill(pid, 0)  # Проверка существования процесса
+            except OSError:
+                stopped = True
+                break
+
+        if stopped:
             print("✅ Парсер успешно остановлен")
-        
+        else:
+            print("⚠️  Процесс еще работает, отправляем SIGKILL...")
+            os.kill(pid, signal.SIGKILL)
+
         # Удаляем PID файл
         os.remove(pid_file)
         
@@ -1,14 +1,66 @@
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import io
 import json
+import logging
+import os
+import queue
+import random
+import signal
+import sys
 import time
+from logging.handlers import QueueHandler, QueueListener
 from typing import List, Dict, Optional
 import re
+
+try:
+    import orjson  # быстрая C-сериализация JSON, опционально
+except ImportError:
+    orjson = None
+try:
+    import ijson  # потоковый разбор JSON, опционально
+except ImportError:
+    ijson = None
 from database_manager import DatabaseManager
+from models import Buyer, Project
 from telegram_bot import TelegramBot
 import config
 
 
+# Скомпилирован один раз на модуль, а не при каждом вызове.
+# Байтовый шаблон: ищем прямо в response.content, не декодируя
+# весь HTML в str ради одного JSON-фрагмента
+_STATE_DATA_RE = re.compile(rb'window\.stateData\s*=\s*({.*?});', re.DOTALL)
+
+logger = logging.getLogger(__name__)
+
+
+def _setup_logging() -> QueueListener:
+    """
+    Настройка логирования через очередь
+
+    Записи складываются в очередь, а форматирование и запись в stdout
+    делает фоновый поток QueueListener — горячий цикл парсинга не ждёт
+    синхронных записей в терминал.
+
+    Returns:
+        Запущенный QueueListener (остановить при завершении)
+    """
+    log_queue = queue.SimpleQueue()
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(message)s'))
+
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(QueueHandler(log_queue))
+
+    listener = QueueListener(log_queue, handler)
+    listener.start()
+    return listener
+
+
 class KworkParser:
     """Парсер проектов с сайта kwork.ru с сохранением в БД и отправкой в Telegram"""
     
@@ -21,8 +73,30 @@ class KworkParser:
             'Accept-Encoding': 'gzip, deflate, br',
             'Connection': 'keep-alive',
         }
+        # Одна сессия на все запросы: keep-alive экономит DNS + TCP/TLS
+        # рукопожатие на каждую страницу, плюс повторные попытки на 429/5xx
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=16,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504]
+            )
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
         self.db = DatabaseManager(db_path)
-        
+
+        # Настройки отправки читаются из config один раз, а не на
+        # каждый пакет проектов
+        self._send_individual = getattr(config, 'SEND_INDIVIDUAL_PROJECTS', False)
+        self._batch_size = getattr(config, 'PROJECTS_PER_MESSAGE', None)
+
+
         # Инициализация Telegram бота
         self.use_telegram = use_telegram
         self.telegram = None
@@ -60,7 +134,7 @@ class KworkParser:
             print(f"❌ Ошибка инициализации Telegram: {e}")
             self.use_telegram = False
     
-    def parse_page(self, page: int = 1) -> List[Dict]:
+    def parse_page(self, page: int = 1) -> List[Project]:
         """
         Парсит страницу с проектами
         
@@ -73,61 +147,44 @@ class KworkParser:
         url = f"{self.base_url}/projects?c=11&page={page}"
         
         try:
-            print(f"\n{'='*60}")
-            print(f"📄 Запрос к URL: {url}")
-            response = requests.get(url, headers=self.headers, timeout=10)
+            logger.debug("📄 Запрос к URL: %s", url)
+            response = self.session.get(url, timeout=10)
             response.raise_for_status()
-            
-            print(f"✓ Статус ответа: {response.status_code}")
-            
-            # Извлекаем данные из JavaScript
-            projects = self._extract_projects_from_js(response.text)
-            
-            print(f"✓ Найдено проектов на странице: {len(projects)}")
-            print(f"{'='*60}\n")
-            
+
+            logger.debug("✓ Статус ответа: %s", response.status_code)
+
+            # Извлекаем данные из JavaScript (сырые байты, без
+            # UTF-8-декодирования всей страницы)
+            projects = self._extract_projects_from_js(response.content)
+
+            logger.debug("✓ Найдено проектов на странице: %s", len(projects))
+
             return projects
-            
+
         except requests.RequestException as e:
-            print(f"❌ Ошибка при запросе страницы {page}: {e}")
+            logger.warning("❌ Ошибка при запросе страницы %s: %s", page, e)
             return []
     
-    def _extract_projects_from_js(self, html: str) -> List[Dict]:
+    def _extract_projects_from_js(self, html: bytes) -> List[Project]:
         """
         Извлекает данные о проектах из JavaScript переменной window.stateData
-        
+
         Args:
-            html: HTML-код страницы
-            
+            html: HTML-код страницы в байтах (response.content)
+
         Returns:
             Список проектов
         """
         try:
             # Ищем window.stateData в коде страницы
-            pattern = r'window\.stateData\s*=\s*({.*?});'
-            match = re.search(pattern, html, re.DOTALL)
-            
+            match = _STATE_DATA_RE.search(html)
+
             if not match:
-                print("⚠️  Не найдена переменная window.stateData")
+                logger.warning("⚠️  Не найдена переменная window.stateData")
                 return []
-            
-            # Парсим JSON
-            state_data = json.loads(match.group(1))
-            
-            # Проверяем наличие данных о проектах
-            if 'wantsListData' not in state_data:
-                print("⚠️  Нет данных wantsListData в stateData")
-                return []
-            
-            wants_list = state_data['wantsListData']
-            
-            # Извлекаем список проектов
-            if 'pagination' in wants_list and 'data' in wants_list['pagination']:
-                projects_raw = wants_list['pagination']['data']
-            elif 'wants' in wants_list:
-                projects_raw = wants_list['wants']
-            else:
-                print("⚠️  Не найден список проектов в данных")
+
+            projects_raw = self._extract_projects_raw(match.group(1))
+            if projects_raw is None:
                 return []
             
             # Преобразуем в удобный формат
@@ -139,64 +196,155 @@ class KworkParser:
             
             return projects
             
-        except json.JSONDecodeError as e:
-            print(f"❌ Ошибка парсинга JSON: {e}")
+        except ValueError as e:  # JSONDecodeError и json, и orjson
+            logger.warning("❌ Ошибка парсинга JSON: %s", e)
             return []
         except Exception as e:
-            print(f"❌ Ошибка извлечения данных: {e}")
+            logger.warning("❌ Ошибка извлечения данных: %s", e)
             return []
+
+    @staticmethod
+    def _extract_projects_raw(json_bytes: bytes) -> Optional[List[Dict]]:
+        """
+        Достаёт список сырых проектов из JSON-байтов stateData
+
+        С ijson материализуется только нужное поддерево
+        (wantsListData.pagination.data) вместо всего многомегабайтного
+        стейта; без ijson — полный разбор через orjson/json.
+
+        Args:
+            json_bytes: байты объекта window.stateData
+
+        Returns:
+            Список словарей проектов или None, если их нет в данных
+        """
+        if ijson is not None:
+            projects_raw = list(ijson.items(
+                io.BytesIO(json_bytes), 'wantsListData.pagination.data.item'))
+            if not projects_raw:
+                projects_raw = list(ijson.items(
+                    io.BytesIO(json_bytes), 'wantsListData.wants.item'))
+            if not projects_raw:
+                logger.warning("⚠️  Не найден список проектов в данных")
+                return None
+            return projects_raw
+
+        # Парсим JSON целиком: стейт занимает мегабайты, orjson
+        # разбирает его в разы быстрее стандартного json
+        if orjson is not None:
+            state_data = orjson.loads(json_bytes)
+        else:
+            state_data = json.loads(json_bytes)
+
+        # Проверяем наличие данных о проектах
+        if 'wantsListData' not in state_data:
+            logger.warning("⚠️  Нет данных wantsListData в stateData")
+            return None
+
+        wants_list = state_data['wantsListData']
+
+        # Извлекаем список проектов
+        if 'pagination' in wants_list and 'data' in wants_list['pagination']:
+            return wants_list['pagination']['data']
+        if 'wants' in wants_list:
+            return wants_list['wants']
+
+        logger.warning("⚠️  Не найден список проектов в данных")
+        return None
     
-    def _parse_project_data(self, data: Dict) -> Optional[Dict]:
+    def _parse_project_data(self, data: Dict) -> Optional[Project]:
         """
-        Преобразует сырые данные проекта в удобный формат
-        
+        Преобразует сырые данные проекта в компактную запись
+
         Args:
             data: Словарь с данными проекта
-            
+
         Returns:
-            Очищенный словарь с данными проекта
+            Запись Project (с вложенным Buyer, если есть)
         """
         try:
-            project = {
-                'id': data.get('id'),
-                'name': data.get('name', ''),
-                'url': f"{self.base_url}/projects/{data.get('id', '')}",
-                'description': data.get('description', ''),
-                'price_limit': data.get('priceLimit', ''),
-                'possible_price_limit': data.get('possiblePriceLimit', ''),
-                'category_id': data.get('category_id', ''),
-                'status': data.get('status', ''),
-                'time_left': data.get('timeLeft', ''),
-                'offers_count': data.get('views_dirty', 0),
-                'date_create': data.get('date_create', ''),
-                'date_active': data.get('date_active', ''),
-                'date_expire': data.get('date_expire', ''),
-                'kwork_count': data.get('kwork_count', 0),
-                'is_higher_price': data.get('isHigherPrice', False),
-            }
-            
             # Данные о покупателе
+            buyer = None
             if 'user' in data:
                 user = data['user']
-                project['buyer'] = {
-                    'username': user.get('username', ''),
-                    'user_id': user.get('USERID', ''),
-                    'profile_url': f"{self.base_url}/user/{user.get('username', '')}",
-                    'avatar': user.get('profilepicture', ''),
-                }
-                
-                # Статистика покупателя
-                if 'data' in user:
-                    user_data = user['data']
-                    project['buyer']['wants_count'] = user_data.get('wants_count', '0')
-                    project['buyer']['hired_percent'] = user_data.get('wants_hired_percent', '0')
-            
-            return project
-            
+                user_data = user.get('data') or {}
+                buyer = Buyer(
+                    user_id=user.get('USERID', ''),
+                    username=user.get('username', ''),
+                    profile_url=f"{self.base_url}/user/{user.get('username', '')}",
+                    avatar=user.get('profilepicture', ''),
+                    wants_count=user_data.get('wants_count', '0'),
+                    hired_percent=user_data.get('wants_hired_percent', '0'),
+                )
+
+            return Project(
+                id=data.get('id'),
+                name=data.get('name', ''),
+                url=f"{self.base_url}/projects/{data.get('id', '')}",
+                description=data.get('description', ''),
+                price_limit=data.get('priceLimit', ''),
+                possible_price_limit=data.get('possiblePriceLimit', ''),
+                category_id=data.get('category_id', ''),
+                status=data.get('status', ''),
+                time_left=data.get('timeLeft', ''),
+                offers_count=data.get('views_dirty', 0),
+                date_create=data.get('date_create', ''),
+                date_active=data.get('date_active', ''),
+                date_expire=data.get('date_expire', ''),
+                kwork_count=data.get('kwork_count', 0),
+                is_higher_price=data.get('isHigherPrice', False),
+                buyer=buyer,
+            )
+
         except Exception as e:
-            print(f"❌ Ошибка обработки проекта: {e}")
+            logger.debug("❌ Ошибка обработки проекта: %s", e)
             return None
     
+    def _fetch_page_polite(self, page: int, jitter: float) -> List[Project]:
+        """
+        Загрузка страницы со случайным сдвигом старта
+
+        Вежливость обеспечивает размер пула (не больше 4 одновременных
+        запросов); джиттер лишь разносит старты, чтобы запросы не ушли
+        на сайт одной пачкой. Спит рабочий поток, а не главный.
+
+        Args:
+            page: номер страницы
+            jitter: верхняя граница случайной задержки старта в секундах
+
+        Returns:
+            Список проектов со страницы
+        """
+        if jitter > 0:
+            time.sleep(random.uniform(0, jitter))
+        return self.parse_page(page)
+
+    def _fetch_pages(self, start_page: int, end_page: int, delay: float) -> List[tuple]:
+        """
+        Параллельная загрузка страниц через пул потоков
+
+        Args:
+            start_page: начальная страница
+            end_page: конечная страница
+            delay: окно джиттера стартов запросов в секундах
+
+        Returns:
+            Список пар (номер страницы, список проектов) в порядке страниц
+        """
+        page_numbers = list(range(start_page, end_page + 1))
+        results = {}
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            futures = {
+                pool.submit(self._fetch_page_polite, page, delay): page
+                for page in page_numbers
+            }
+
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+
+        return [(page, results[page]) for page in page_numbers]
+
     def parse_and_save(self, start_page: int = 1, end_page: int = 5, delay: float = 2.0) -> Dict:
         """
         Парсит страницы, сохраняет в БД и отправляет новые проекты в Telegram
@@ -215,52 +363,36 @@ class KworkParser:
         self.db.connect()
         self.db.init_database()
         
-        all_new_projects = []
-        total_inserted = 0
-        total_skipped = 0
-        
-        for page in range(start_page, end_page + 1):
-            print(f"\n{'#'*60}")
-            print(f"📄 СТРАНИЦА {page}")
-            print(f"{'#'*60}")
-            
-            projects = self.parse_page(page)
-            
-            if projects:
-                # Получаем ID существующих проектов
-                project_ids = [p.get('id') for p in projects if p.get('id')]
-                existing_ids = self.db.get_existing_project_ids(project_ids)
-                
-                # Разделяем на новые и существующие
-                new_projects = []
-                for proj in projects:
-                    proj_id = proj.get('id')
-                    if not proj_id:
-                        continue
-                    
-                    if proj_id in existing_ids:
-                        total_skipped += 1
-                        print(f"⊘ Проект ID {proj_id} уже существует, пропускаем")
-                    else:
-                        new_projects.append(proj)
-                        total_inserted += 1
-                        print(f"✓ Добавлен проект ID {proj_id}: {proj.get('name', '')[:50]}")
-                
-                # Сохраняем только новые в БД
-                if new_projects:
-                    for proj in new_projects:
-                        self.db.insert_project(proj)
-                    self.db.conn.commit()
-                    all_new_projects.extend(new_projects)
-                    
-                    # Отправляем в Telegram
-                    if self.use_telegram:
-                        self._send_to_telegram(new_projects)
-            
-            if page < end_page:
-                print(f"\n⏳ Ожидание {delay} сек. перед следующей страницей...")
-                time.sleep(delay)
-        
+        # Страницы качаются параллельно: критический путь — самый
+        # медленный запрос, а не сумма всех задержек
+        pages = self._fetch_pages(start_page, end_page, delay)
+
+        all_projects = []
+        # Один и тот же проект может попасть на соседние страницы, если
+        # пагинация сдвинулась во время обхода — дубли отсекаем в памяти,
+        # до БД и до отправки в Telegram
+        seen_ids = set()
+        for page, projects in pages:
+            logger.debug("✓ Страница %s: получено %s проектов", page, len(projects))
+            for p in projects:
+                if p.id and p.id not in seen_ids:
+                    seen_ids.add(p.id)
+                    all_projects.append(p)
+
+        # Вставляем всё одной транзакцией; какие проекты действительно
+        # новые — решает сам SQLite через INSERT OR IGNORE, без
+        # предварительного SELECT существующих ID
+        new_ids = set(self.db.insert_projects_returning_new(all_projects))
+        all_new_projects = [p for p in all_projects if p.id in new_ids]
+
+        total_inserted = len(all_new_projects)
+        total_skipped = len(all_projects) - total_inserted
+        logger.info("✓ Всего: новых %s, пропущено %s", total_inserted, total_skipped)
+
+        # Отправляем новые в Telegram
+        if self.use_telegram and all_new_projects:
+            self._send_to_telegram(all_new_projects)
+
         # Получаем статистику БД
         db_stats = self.db.get_statistics()
         
@@ -282,7 +414,7 @@ class KworkParser:
         
         return stats
     
-    def _send_to_telegram(self, projects: List[Dict]):
+    def _send_to_telegram(self, projects: List[Project]):
         """
         Отправка проектов в Telegram
         
@@ -293,32 +425,41 @@ class KworkParser:
             return
         
         try:
-            # Проверяем настройку индивидуальной отправки
-            send_individual = getattr(config, 'SEND_INDIVIDUAL_PROJECTS', False)
-            
-            if send_individual:
-                # Отправляем каждый проект отдельным сообщением
+            if self._send_individual:
+                # Отправляем каждый проект отдельным сообщением;
+                # темп дозирует сам бот, без фиксированного sleep
                 for project in projects:
                     self.telegram.send_project(project)
-                    time.sleep(0.5)  # Небольшая задержка
             else:
-                # Отправляем пакетами
-                batch_size = getattr(config, 'PROJECTS_PER_MESSAGE', 5)
-                self.telegram.send_projects_batch(projects, batch_size)
+                # Отправляем пакетами: None — упаковка по лимиту длины
+                self.telegram.send_projects_batch(projects, self._batch_size)
                 
         except Exception as e:
             print(f"❌ Ошибка отправки в Telegram: {e}")
     
-    def _save_new_projects_to_json(self, projects: List[Dict], filename: str):
+    def _save_new_projects_to_json(self, projects: List[Project], filename: str):
         """
         Сохраняет только новые проекты в JSON
-        
+
         Args:
             projects: список новых проектов
             filename: имя файла
         """
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(projects, f, ensure_ascii=False, indent=2)
+        records = [p.to_dict() for p in projects]
+        # Сериализуем в один буфер и пишем одним write; orjson делает
+        # отступы на C-скорости, json.dumps — медленнее, но тоже одним
+        # вызовом вместо потоковой записи json.dump
+        if orjson is not None:
+            data = orjson.dumps(
+                records, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE)
+        else:
+            data = json.dumps(records, ensure_ascii=False, indent=2).encode('utf-8')
+
+        # Атомарная замена: упавший процесс не оставит обрезанный файл
+        tmp = filename + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, filename)
         print(f"\n✓ Новые проекты ({len(projects)} шт.) сохранены в {filename}")
     
     def export_all_from_db(self, filename: str = "all_projects.json"):
@@ -344,6 +485,13 @@ class KworkParser:
 
 def main():
     """Основная функция для запуска парсера"""
+    # Корректное завершение по SIGTERM от stop_daemon: SystemExit
+    # раскручивает стек, соединение с БД закрывается штатно
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    # Лог пишет фоновый поток — горячий путь не блокируется на stdout
+    log_listener = _setup_logging()
+
     print("="*60)
     print("🚀 ПАРСЕР ПРОЕКТОВ KWORK.RU")
     print("📱 С ОТПРАВКОЙ В TELEGRAM")
@@ -368,7 +516,11 @@ def main():
         print("="*60)
         
         run_count = 0
-        
+        interval_seconds = interval_minutes * 60
+        # Дедлайн следующего запуска: период не плывёт на время самого
+        # парсинга, спим только остаток до дедлайна
+        next_run = time.monotonic()
+
         while True:
             try:
                 run_count += 1
@@ -397,15 +549,18 @@ def main():
                 if stats['db_total_projects'] > 130:
                     parser.clear_database()
 
-                # Ожидание перед следующим запуском
-                interval_seconds = interval_minutes * 60
-                next_run = time.strftime('%H:%M:%S', time.localtime(time.time() + interval_seconds))
-                
-                print(f"\n⏳ Ожидание {interval_minutes} минут до следующей проверки...")
-                print(f"⏰ Следующий запуск в: {next_run}")
+                # Ожидание до следующего дедлайна; если парсинг занял
+                # больше интервала — запускаемся сразу
+                next_run += interval_seconds
+                sleep_for = max(0, next_run - time.monotonic())
+                next_run_clock = time.strftime(
+                    '%H:%M:%S', time.localtime(time.time() + sleep_for))
+
+                print(f"\n⏳ Ожидание {sleep_for / 60:.1f} минут до следующей проверки...")
+                print(f"⏰ Следующий запуск в: {next_run_clock}")
                 print(f"💤 Нажмите Ctrl+C для остановки\n")
-                
-                time.sleep(interval_seconds)
+
+                time.sleep(sleep_for)
                 
             except KeyboardInterrupt:
                 print("\n\n" + "="*60)
@@ -419,7 +574,9 @@ def main():
             except Exception as e:
                 print(f"\n❌ Ошибка в цикле: {e}")
                 print(f"⏳ Повторная попытка через {interval_minutes} минут...\n")
-                time.sleep(interval_minutes * 60)
+                time.sleep(interval_seconds)
+                # Отсчитываем расписание заново от повторного запуска
+                next_run = time.monotonic()
     
     else:
         # Режим одноразового запуска
@@ -444,6 +601,9 @@ def main():
         print(f"👥 Всего покупателей в БД: {stats['db_total_buyers']}")
         print("="*60)
 
+    # Дописываем накопленное в очереди перед выходом
+    log_listener.stop()
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
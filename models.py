@@ -0,0 +1,54 @@
+"""Компактные записи проекта и покупателя
+
+Замороженные датаклассы со __slots__ вместо словарей: один проект —
+один компактный объект с доступом по атрибутам, заметно меньше памяти
+и без строковых хеш-поисков в горячих циклах. Неизменяемость делает
+записи хешируемыми (пригодно для кэшей).
+"""
+
+from dataclasses import dataclass, asdict
+from typing import Optional
+
+
+@dataclass(frozen=True, slots=True)
+class Buyer:
+    """Покупатель (заказчик) проекта"""
+    user_id: str = ''
+    username: str = ''
+    profile_url: str = ''
+    avatar: str = ''
+    wants_count: str = '0'
+    hired_percent: str = '0'
+
+
+@dataclass(frozen=True, slots=True)
+class Project:
+    """Проект с kwork.ru"""
+    id: Optional[int] = None
+    name: str = ''
+    url: str = ''
+    description: str = ''
+    price_limit: str = ''
+    possible_price_limit: str = ''
+    category_id: str = ''
+    status: str = ''
+    time_left: str = ''
+    offers_count: int = 0
+    date_create: str = ''
+    date_active: str = ''
+    date_expire: str = ''
+    kwork_count: int = 0
+    is_higher_price: bool = False
+    buyer: Optional[Buyer] = None
+
+    def to_dict(self) -> dict:
+        """
+        Словарь для JSON-выгрузки
+
+        Returns:
+            Словарь полей проекта; ключ 'buyer' опускается, если его нет
+        """
+        data = asdict(self)
+        if data['buyer'] is None:
+            del data['buyer']
+        return data
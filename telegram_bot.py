@@ -1,7 +1,115 @@
 import requests
+from functools import lru_cache
 from typing import List, Dict, Optional
 import time
 
+from models import Project
+
+
+# Запас до лимита Telegram в 4096 символов на сообщение
+_MAX_BATCH_CHARS = 3900
+
+# Минимальный интервал между сообщениями в один чат (лимит Telegram ~1/сек)
+_MIN_SEND_INTERVAL = 1.0
+
+# Таблица экранирования HTML: один проход str.translate вместо
+# трёх последовательных str.replace
+_HTML_ESCAPE_TABLE = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;'})
+
+# Шаблоны сообщений собраны один раз на модуль
+_PROJECT_MESSAGE_TMPL = """<b>{name}</b>
+
+<b>Бюджет:</b> {price_limit} - {possible_price} ₽
+<b>Осталось:</b> {time_left}
+<b>Предложений:</b> {workers}
+{buyer_info}
+
+<b>Описание:</b>
+{description}
+
+<a href="{url}">Перейти к проекту</a>
+━━━━━━━━━━━━━━━━━━━━"""
+
+_BUYER_INFO_TMPL = """
+<b>Заказчик:</b> {username}
+Проектов: {wants_count} | Нанято: {hired_percent}%"""
+
+_BATCH_ITEM_TMPL = """<b>{name}</b>
+   {price_limit} - {possible_price} ₽
+   <a href="{url}">Открыть</a>
+"""
+
+
+def _escape_html_text(text) -> str:
+    """Экранирование HTML-символов для Telegram одним проходом"""
+    if not text:
+        return ""
+    return str(text).translate(_HTML_ESCAPE_TABLE)
+
+
+@lru_cache(maxsize=4096)
+def _format_batch_item(project: Project) -> str:
+    """
+    Строка проекта для пакетного сообщения (без порядкового номера)
+
+    Записи Project заморожены и хешируемы, поэтому результат кэшируется:
+    при повторной отправке того же проекта экранирование и форматирование
+    не выполняются заново.
+
+    Args:
+        project: запись проекта
+
+    Returns:
+        HTML-фрагмент для пакетного сообщения
+    """
+    return _BATCH_ITEM_TMPL.format(
+        name=_escape_html_text(project.name or 'Без названия'),
+        price_limit=project.price_limit or 'N/A',
+        possible_price=project.possible_price_limit or 'N/A',
+        url=project.url
+    )
+
+
+@lru_cache(maxsize=4096)
+def _format_full_message(project: Project) -> str:
+    """
+    Полное сообщение о проекте (БЕЗ эмодзи), с кэшированием
+
+    Args:
+        project: запись проекта
+
+    Returns:
+        Отформатированное сообщение
+    """
+    name = _escape_html_text(project.name or 'Без названия')
+    description = _escape_html_text(project.description or 'Нет описания')
+    workers = _escape_html_text(project.kwork_count or '0')
+
+    # Обрезаем описание если слишком длинное
+    if len(description) > 500:
+        description = description[:497] + "..."
+
+    # Информация о покупателе
+    buyer_info = ""
+    if project.buyer:
+        buyer = project.buyer
+        buyer_info = _BUYER_INFO_TMPL.format(
+            username=_escape_html_text(buyer.username or 'N/A'),
+            wants_count=buyer.wants_count,
+            hired_percent=buyer.hired_percent
+        )
+
+    return _PROJECT_MESSAGE_TMPL.format(
+        name=name,
+        price_limit=project.price_limit or 'N/A',
+        possible_price=project.possible_price_limit or 'N/A',
+        time_left=project.time_left or 'N/A',
+        workers=workers,
+        buyer_info=buyer_info,
+        description=description,
+        url=project.url
+    )
+
 
 class TelegramBot:
     """Класс для работы с Telegram Bot API"""
@@ -17,6 +125,10 @@ class TelegramBot:
         self.bot_token = bot_token
         self.chat_id = chat_id
         self.base_url = f"https://api.telegram.org/bot{bot_token}"
+        # Одна сессия на все вызовы API — TLS-соединение переиспользуется
+        self.session = requests.Session()
+        # Монотонное время последней отправки для дозирования темпа
+        self._last_send = 0.0
     
     def send_message(self, text: str, parse_mode: str = "HTML") -> bool:
         """
@@ -42,9 +154,11 @@ class TelegramBot:
             'parse_mode': parse_mode,
             'disable_web_page_preview': True
         }
-        
+
+        self._throttle()
+
         try:
-            response = requests.post(url, json=payload, timeout=10)
+            response = self.session.post(url, json=payload, timeout=10)
             response.raise_for_status()
             return True
         except requests.RequestException as e:
@@ -79,154 +193,106 @@ class TelegramBot:
             parts.append(text[:split_pos])
             text = text[split_pos:].lstrip()
         
-        # Отправляем части
-        for i, part in enumerate(parts):
-            if i > 0:
-                time.sleep(1)  # Задержка между сообщениями
-            
+        # Отправляем части (темп дозирует _throttle внутри send_message)
+        for part in parts:
             if not self.send_message(part, parse_mode):
                 return False
-        
+
         return True
+
+    def _throttle(self):
+        """
+        Дозирование темпа отправки: спим только если предыдущее
+        сообщение ушло меньше _MIN_SEND_INTERVAL назад
+        """
+        wait = self._last_send + _MIN_SEND_INTERVAL - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self._last_send = time.monotonic()
     
-    def send_project(self, project: Dict) -> bool:
+    def send_project(self, project: Project) -> bool:
         """
         Отправка информации о проекте
-        
+
         Args:
-            project: словарь с данными о проекте
-            
+            project: запись проекта
+
         Returns:
             True если успешно
         """
         message = self._format_project_message(project)
         return self.send_message(message)
     
-    def send_projects_batch(self, projects: List[Dict], batch_size: int = 5) -> int:
+    def send_projects_batch(self, projects: List[Project], batch_size: Optional[int] = None) -> int:
         """
-        Отправка списка проектов (группировка по batch_size)
-        
+        Отправка списка проектов с упаковкой по лимиту длины сообщения
+
+        Проекты набиваются в сообщение, пока оно влезает в лимит
+        Telegram — чем меньше сообщений, тем меньше HTTP-запросов.
+
         Args:
             projects: список проектов
-            batch_size: количество проектов в одном сообщении
-            
+            batch_size: необязательный верхний предел проектов в сообщении
+
         Returns:
             Количество успешно отправленных проектов
         """
         sent_count = 0
-        
-        for i in range(0, len(projects), batch_size):
-            batch = projects[i:i + batch_size]
-            message = self._format_projects_batch(batch, i + 1)
-            
-            if self.send_message(message):
-                sent_count += len(batch)
-                print(f"✓ Отправлено в Telegram: {len(batch)} проектов")
+        items = []       # отформатированные проекты текущего сообщения
+        batch_start = 1  # номер первого проекта в текущем сообщении
+        batch_len = 0
+
+        def flush():
+            nonlocal sent_count, items, batch_start, batch_len
+            if not items:
+                return
+            header = f"<b>Новые проекты ({batch_start}-{batch_start + len(items) - 1}):</b>\n"
+            if self.send_message(header + "".join(items)):
+                sent_count += len(items)
+                print(f"✓ Отправлено в Telegram: {len(items)} проектов")
             else:
-                print(f"❌ Ошибка отправки пакета проектов {i + 1}")
-            
-            # Задержка между пакетами
-            if i + batch_size < len(projects):
-                time.sleep(1)
-        
-        return sent_count
-    
-    def _format_project_message(self, project: Dict) -> str:
-        """
-        Форматирование сообщения о проекте (БЕЗ эмодзи)
-        
-        Args:
-            project: данные проекта
-            
-        Returns:
-            Отформатированное сообщение
-        """
-        name = self._escape_html(project.get('name', 'Без названия'))
-        description = self._escape_html(project.get('description', 'Нет описания'))
-        workers = self._escape_html(project.get('kwork_count', '0'))
-        
-        # Обрезаем описание если слишком длинное
-        if len(description) > 500:
-            description = description[:497] + "..."
-        
-        price_limit = project.get('price_limit', 'N/A')
-        possible_price = project.get('possible_price_limit', 'N/A')
-        time_left = project.get('time_left', 'N/A')
-        url = project.get('url', '')
-        
-        # Информация о покупателе
-        buyer_info = ""
-        if 'buyer' in project and project['buyer']:
-            buyer = project['buyer']
-            username = self._escape_html(buyer.get('username', 'N/A'))
-            wants_count = buyer.get('wants_count', '0')
-            hired_percent = buyer.get('hired_percent', '0')
-            buyer_info = f"""
-<b>Заказчик:</b> {username}
-Проектов: {wants_count} | Нанято: {hired_percent}%"""
-        
-        message = f"""
-<b>{name}</b>
+                print(f"❌ Ошибка отправки пакета проектов {batch_start}")
+            batch_start += len(items)
+            items = []
+            batch_len = 0
 
-<b>Бюджет:</b> {price_limit} - {possible_price} ₽
-<b>Осталось:</b> {time_left}
-<b>Предложений:</b> {workers}
-{buyer_info}
+        for i, project in enumerate(projects, 1):
+            # Тело строки берётся из кэша; меняется только номер
+            item = f"\n{i}. " + _format_batch_item(project)
 
-<b>Описание:</b>
-{description}
+            if items and (batch_len + len(item) > _MAX_BATCH_CHARS
+                          or (batch_size and len(items) >= batch_size)):
+                flush()
 
-<a href="{url}">Перейти к проекту</a>
-━━━━━━━━━━━━━━━━━━━━
-"""
-        return message.strip()
+            items.append(item)
+            batch_len += len(item)
+
+        flush()
+        return sent_count
     
-    def _format_projects_batch(self, projects: List[Dict], start_num: int) -> str:
+    def _format_project_message(self, project: Project) -> str:
         """
-        Форматирование группы проектов в одно сообщение (БЕЗ эмодзи)
-        
+        Форматирование сообщения о проекте (через кэш модуля)
+
         Args:
-            projects: список проектов
-            start_num: начальный номер
-            
+            project: запись проекта
+
         Returns:
             Отформатированное сообщение
         """
-        messages = [f"<b>Новые проекты ({start_num}-{start_num + len(projects) - 1}):</b>\n"]
-        
-        for i, project in enumerate(projects, start_num):
-            name = self._escape_html(project.get('name', 'Без названия'))
-            price_limit = project.get('price_limit', 'N/A')
-            possible_price = project.get('possible_price_limit', 'N/A')
-            url = project.get('url', '')
-            
-            msg = f"""
-{i}. <b>{name}</b>
-   {price_limit} - {possible_price} ₽
-   <a href="{url}">Открыть</a>
-"""
-            messages.append(msg)
-        
-        return "".join(messages)
-    
+        return _format_full_message(project)
+
     def _escape_html(self, text: str) -> str:
         """
         Экранирование HTML символов для Telegram
-        
+
         Args:
             text: исходный текст
-            
+
         Returns:
             Экранированный текст
         """
-        if not text:
-            return ""
-        
-        text = str(text)
-        text = text.replace('&', '&amp;')
-        text = text.replace('<', '&lt;')
-        text = text.replace('>', '&gt;')
-        return text
+        return _escape_html_text(text)
     
     def test_connection(self) -> bool:
         """
@@ -238,7 +304,7 @@ class TelegramBot:
         url = f"{self.base_url}/getMe"
         
         try:
-            response = requests.get(url, timeout=10)
+            response = self.session.get(url, timeout=10)
             response.raise_for_status()
             data = response.json()
             